@@ -23,68 +23,130 @@ Classification rules:
 import argparse
 import json
 import os
+import queue
 import subprocess
 import sys
-import tempfile
+import threading
 import time
 
+import numpy as np
+
 
 def sample_frames(video_path, num_frames=10):
-    """Extract N evenly-spaced frames from video as JPEG files."""
-    # Get duration
+    """Stream N evenly-spaced frames from video as RGB arrays.
+
+    Returns a generator of (timestamp, np.ndarray) pairs decoded straight
+    from a raw FFmpeg pipe — no JPEG encode/decode or temp files in between.
+
+    Each frame is fetched with input seeking (-ss before -i), which jumps
+    to the nearest keyframe instead of decoding the stream up to the
+    sample point. This runs on the full longform source, so ten keyframe
+    seeks beat any single-pass scheme that would decode hours of video to
+    reach ten frames.
+    """
+    # Get dimensions and duration
     result = subprocess.run(
-        ["ffprobe", "-v", "quiet", "-show_entries", "format=duration",
+        ["ffprobe", "-v", "quiet", "-select_streams", "v:0",
+         "-show_entries", "stream=width,height",
+         "-show_entries", "format=duration",
          "-of", "csv=p=0", video_path],
         capture_output=True, text=True
     )
     try:
-        duration = float(result.stdout.strip())
-    except (ValueError, AttributeError):
+        lines = result.stdout.strip().splitlines()
+        w_str, h_str = lines[0].split(",")[:2]
+        w, h = int(w_str), int(h_str)
+        duration = float(lines[1])
+    except (ValueError, IndexError, AttributeError):
         print(json.dumps({"error": f"Could not determine video duration: {video_path}"}))
         sys.exit(1)
 
-    tmpdir = tempfile.mkdtemp(prefix="detect_content_")
     timestamps = [duration * (i + 0.5) / num_frames for i in range(num_frames)]
-    frame_paths = []
-
-    for i, ts in enumerate(timestamps):
-        out_path = os.path.join(tmpdir, f"frame_{i:03d}.jpg")
-        subprocess.run(
-            ["ffmpeg", "-y", "-ss", str(ts), "-i", video_path,
-             "-vframes", "1", "-q:v", "2", out_path],
-            capture_output=True, text=True
-        )
-        if os.path.exists(out_path):
-            frame_paths.append(out_path)
 
-    return frame_paths, tmpdir
+    # Detect at <=720p — face bboxes come back normalized, so 4K frames only
+    # add decode + inference cost (~9x more pixels than needed)
+    if w > 1280:
+        h = (h * 1280 // w) & ~1
+        w = 1280
+
+    frame_size = w * h * 3
+
+    def _frames():
+        for ts in timestamps:
+            # One frame per seek, piped as raw RGB (MediaPipe wants RGB,
+            # so there's no colorspace conversion either)
+            result = subprocess.run(
+                ["ffmpeg", "-ss", f"{ts:.3f}", "-i", video_path,
+                 "-frames:v", "1", "-vf", f"scale={w}:{h}",
+                 "-pix_fmt", "rgb24", "-f", "rawvideo", "-"],
+                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+            )
+            if len(result.stdout) < frame_size:
+                continue
+            yield ts, np.frombuffer(
+                result.stdout, dtype=np.uint8, count=frame_size
+            ).reshape(h, w, 3)
+
+    return _frames()
+
+
+_FACE_DETECTOR = None
+
+
+def _get_face_detector():
+    """Lazily create one MediaPipe face detector per process.
+
+    Detector init loads the TFLite graph and allocates tensors (hundreds of
+    ms), so repeated detection passes pay it once.
+    """
+    global _FACE_DETECTOR
+    if _FACE_DETECTOR is None:
+        import mediapipe as mp
+        _FACE_DETECTOR = mp.solutions.face_detection.FaceDetection(
+            model_selection=1,  # Full range model (works for far faces too)
+            min_detection_confidence=0.5
+        )
+    return _FACE_DETECTOR
 
 
-def detect_faces(frame_paths):
-    """Run MediaPipe face detection on frames, return stats."""
-    import mediapipe as mp
-    import cv2
-    import numpy as np
+def detect_faces(frames):
+    """Run MediaPipe face detection on (timestamp, RGB frame) pairs.
 
-    mp_face = mp.solutions.face_detection
-    detector = mp_face.FaceDetection(
-        model_selection=1,  # Full range model (works for far faces too)
-        min_detection_confidence=0.5
-    )
+    Returns (face_stats, face_positions): aggregate stats for
+    classification, plus the per-frame dominant-face track in the same
+    {t, x_center, y_center} format compute_reframe.py consumes — so the
+    reframe step can reuse this pass instead of re-sampling the video.
+    """
+    detector = _get_face_detector()
 
     face_counts = []
     face_sizes = []  # as percentage of frame area
     face_centers_x = []  # normalized x position (0-1)
+    face_positions = []  # dominant face per frame: {t, x_center, y_center}
+
+    # Decode the next frame on a background thread while MediaPipe runs on
+    # the current one — the detector releases the GIL in its C++ core, so a
+    # plain thread overlaps decode latency with inference. maxsize bounds
+    # how many decoded frames sit in memory.
+    q = queue.Queue(maxsize=4)
+
+    def _decode():
+        for item in frames:
+            q.put(item)
+        q.put(None)
+
+    reader = threading.Thread(target=_decode, daemon=True)
+    reader.start()
 
-    for path in frame_paths:
-        img = cv2.imread(path)
-        if img is None:
-            continue
+    while True:
+        item = q.get()
+        if item is None:
+            break
+        ts, rgb = item
 
-        h, w = img.shape[:2]
+        h, w = rgb.shape[:2]
         frame_area = h * w
 
-        rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
         results = detector.process(rgb)
 
         if results.detections:
@@ -97,10 +159,20 @@ def detect_faces(frame_paths):
                 face_sizes.append(face_area_pct)
                 center_x = bbox.xmin + bbox.width / 2
                 face_centers_x.append(center_x)
+
+            best = max(results.detections,
+                       key=lambda d: d.location_data.relative_bounding_box.width *
+                                     d.location_data.relative_bounding_box.height)
+            bbox = best.location_data.relative_bounding_box
+            face_positions.append({
+                "t": round(ts, 2),
+                "x_center": round(bbox.xmin + bbox.width / 2, 4),
+                "y_center": round(bbox.ymin + bbox.height / 2, 4),
+            })
         else:
             face_counts.append(0)
 
-    detector.close()
+    reader.join()
 
     avg_count = float(np.mean(face_counts)) if face_counts else 0
     avg_size = float(np.mean(face_sizes)) if face_sizes else 0
@@ -111,7 +183,7 @@ def detect_faces(frame_paths):
         # How close to center (0.5)? 1.0 = perfectly centered
         center_bias = 1.0 - float(np.mean([abs(x - 0.5) for x in face_centers_x])) * 2
 
-    return {
+    face_stats = {
         "avg_count": round(avg_count, 2),
         "avg_size_pct": round(avg_size, 2),
         "max_size_pct": round(max_size, 2),
@@ -121,35 +193,43 @@ def detect_faces(frame_paths):
         "total_frames": len(face_counts),
     }
 
+    return face_stats, face_positions
+
 
 def classify(face_stats):
-    """Classify content type based on face detection stats."""
+    """Classify content type based on face detection stats.
+
+    All rules evaluate in one vectorized pass — conditions and confidences
+    go into parallel arrays and np.argmax picks the first matching rule,
+    preserving the original branch-cascade priority:
+    1. screen: few/no faces or very small faces
+    2. podcast: multiple faces consistently
+    3. screen: PiP / off-center face (webcam overlay, presenter in corner)
+       where face-tracking would zoom into the overlay and lose the content
+    4. talking-head: single face, large, centered
+    """
     avg_count = face_stats["avg_count"]
     avg_size = face_stats["avg_size_pct"]
     center_bias = face_stats["center_bias"]
     face_ratio = face_stats["frames_with_faces"] / max(face_stats["total_frames"], 1)
 
-    # Screen recording: few/no faces or very small faces
-    if avg_count < 0.5 or (avg_size < 5 and face_ratio < 0.5):
-        confidence = min(1.0, (1.0 - avg_count) * 0.5 + (1.0 - face_ratio) * 0.5)
-        return "screen", round(confidence, 3)
-
-    # Podcast: multiple faces consistently
-    if avg_count >= 1.8 and face_ratio > 0.7:
-        confidence = min(1.0, (avg_count - 1.0) * 0.3 + face_ratio * 0.3 + 0.4)
-        return "podcast", round(confidence, 3)
-
-    # PiP / off-center face: small-to-medium face that's far from center
-    # (e.g., webcam overlay in corner, presenter in slide corner)
-    # Face-tracking would zoom into the small face and lose the main content
-    if avg_size < 8 and center_bias < 0.4:
-        confidence = min(1.0, (1.0 - center_bias) * 0.3 + (8 - avg_size) / 8 * 0.3 + 0.3)
-        return "screen", round(confidence, 3)
-
-    # Talking head: single face, large, centered
-    if avg_count >= 0.5 and avg_size >= 5:
-        confidence = min(1.0, center_bias * 0.4 + min(avg_size / 20, 1.0) * 0.3 + face_ratio * 0.3)
-        return "talking-head", round(confidence, 3)
+    labels = ("screen", "podcast", "screen", "talking-head")
+    conditions = np.array([
+        avg_count < 0.5 or (avg_size < 5 and face_ratio < 0.5),
+        avg_count >= 1.8 and face_ratio > 0.7,
+        avg_size < 8 and center_bias < 0.4,
+        avg_count >= 0.5 and avg_size >= 5,
+    ])
+    confidences = np.minimum(1.0, np.array([
+        (1.0 - avg_count) * 0.5 + (1.0 - face_ratio) * 0.5,
+        (avg_count - 1.0) * 0.3 + face_ratio * 0.3 + 0.4,
+        (1.0 - center_bias) * 0.3 + (8 - avg_size) / 8 * 0.3 + 0.3,
+        center_bias * 0.4 + min(avg_size / 20, 1.0) * 0.3 + face_ratio * 0.3,
+    ]))
+
+    idx = int(np.argmax(conditions))  # argmax of a bool array = first True
+    if conditions[idx]:
+        return labels[idx], round(float(confidences[idx]), 3)
 
     # Default to screen if uncertain
     return "screen", 0.5
@@ -170,30 +250,25 @@ def main():
 
     start = time.time()
 
-    # Sample frames
-    frame_paths, tmpdir = sample_frames(args.input, args.frames)
+    # Sample frames and detect faces (frames stream through a pipe)
+    frames = sample_frames(args.input, args.frames)
+    face_stats, face_positions = detect_faces(frames)
 
-    if not frame_paths:
+    if face_stats["total_frames"] == 0:
         print(json.dumps({"error": "No frames could be extracted"}))
         sys.exit(1)
 
-    # Detect faces
-    face_stats = detect_faces(frame_paths)
-
     # Classify
     content_type, confidence = classify(face_stats)
 
     elapsed = time.time() - start
 
-    # Clean up temp frames
-    import shutil
-    shutil.rmtree(tmpdir, ignore_errors=True)
-
     output = {
         "content_type": content_type,
         "confidence": confidence,
         "face_stats": face_stats,
-        "frames_sampled": len(frame_paths),
+        "face_positions": face_positions,
+        "frames_sampled": face_stats["total_frames"],
         "detection_time_sec": round(elapsed, 2),
     }
 
@@ -17,201 +17,359 @@ Usage:
 Output: Same format as approved_segments.json with adjusted start/end times.
 """
 import argparse
+import hashlib
 import json
 import os
+import re
 import subprocess
 import sys
+import tempfile
+
+import numpy as np
+
+try:
+    import orjson  # optional; C JSON codec, much faster on large transcripts
+except ImportError:
+    orjson = None
+
+# silencedetect logs start/end on separate stderr lines; each line is
+# matched as it streams in and paired with minimal state
+_SILENCE_START_RE = re.compile(r"silence_start:\s*(-?\d+\.?\d*)")
+_SILENCE_END_RE = re.compile(r"silence_end:\s*(-?\d+\.?\d*)")
+
+_DURATION_RE = re.compile(r"Duration:\s*(\d+):(\d+):([\d.]+)")
+
+# Sentence-ending punctuation. A frozenset gives O(1) hashed membership
+# and, unlike `c in ".?!"`, is False for the empty string (a word with no
+# text would otherwise count as a sentence end via the substring check)
+_SENT_END = frozenset(".?!")
+
+
+def _cache_dir():
+    """Per-user cache directory (mode 0700) under the system temp dir.
+
+    Cached results are loaded back into this process, so they must not
+    live at predictable world-writable paths where another local user
+    could pre-plant a file.
+    """
+    path = os.path.join(tempfile.gettempdir(), f"claude-shorts-{os.getuid()}")
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    return path
+
+
+def _load_json(path):
+    """Load a JSON file, using orjson when available."""
+    if orjson is not None:
+        with open(path, "rb") as f:
+            return orjson.loads(f.read())
+    with open(path) as f:
+        return json.load(f)
+
+
+def _dump_json(obj, path):
+    """Write a JSON file with 2-space indent, using orjson when available."""
+    if orjson is not None:
+        with open(path, "wb") as f:
+            f.write(orjson.dumps(obj, option=orjson.OPT_INDENT_2))
+        return
+    with open(path, "w") as f:
+        json.dump(obj, f, indent=2)
 
 
 def load_word_timeline(transcript_path):
     """Load word-level timestamps from transcript.
 
-    Returns list of {text, start, end} for every word, sorted by start time.
+    Returns (word_starts, word_ends, is_sentence_end): float64 arrays of
+    every word's start/end time sorted by start so boundary lookups can
+    binary-search instead of scanning the whole list per segment, and a
+    parallel bool array marking words that end a sentence (computed once
+    here instead of re-stripping text in every snap call). The word texts
+    themselves are only needed for that flag, so no per-word dicts are
+    built at all.
+
+    The built arrays are cached in the per-user cache dir keyed by the
+    transcript's mtime and size — reruns while iterating on segment
+    approvals skip the multi-MB JSON parse entirely.
     """
-    with open(transcript_path) as f:
-        data = json.load(f)
+    st = os.stat(transcript_path)
+    key = hashlib.sha1(
+        f"{os.path.abspath(transcript_path)}:{st.st_mtime_ns}:{st.st_size}:v3".encode()
+    ).hexdigest()
+    cache_path = os.path.join(_cache_dir(), f"wordtl-{key}.npz")
+
+    if os.path.exists(cache_path):
+        try:
+            with np.load(cache_path) as npz:
+                return npz["starts"], npz["ends"], npz["sentence_end"]
+        except Exception:
+            pass  # corrupt or truncated cache — rebuild below
 
-    words = []
+    data = _load_json(transcript_path)
+
+    texts = []
+    starts_buf = []
+    ends_buf = []
 
     # Use the segments array which has word-level detail
     for seg in data.get("segments", []):
         for w in seg.get("words", []):
-            words.append({
-                "text": w["word"].strip(),
-                "start": w["start"],
-                "end": w["end"],
-            })
+            texts.append(w["word"].strip())
+            starts_buf.append(w["start"])
+            ends_buf.append(w["end"])
+
+    word_starts = np.asarray(starts_buf, dtype=np.float64)
+    word_ends = np.asarray(ends_buf, dtype=np.float64)
+    is_sentence_end = np.fromiter(
+        (t[-1:] in _SENT_END for t in texts), dtype=bool, count=len(texts)
+    )
 
-    # Sort by start time
-    words.sort(key=lambda w: w["start"])
-    return words
+    # Sort by start time (stable, so ties keep transcript order)
+    order = np.argsort(word_starts, kind="stable")
+    word_starts = word_starts[order]
+    word_ends = word_ends[order]
+    is_sentence_end = is_sentence_end[order]
+
+    try:
+        np.savez(cache_path, starts=word_starts, ends=word_ends,
+                 sentence_end=is_sentence_end)
+    except OSError:
+        pass  # cache is best-effort
+
+    return word_starts, word_ends, is_sentence_end
 
 
 def detect_silences(video_path, min_duration=0.3, noise_threshold=-35):
     """Find silence regions in the audio track using FFmpeg silencedetect.
 
-    Returns list of {start, end} for each silence region.
+    Returns (silences, silence_mids, duration): a list of {start, end} for
+    each silence region, a sorted float64 array of region midpoints for
+    O(log S) nearest-silence lookups (ffmpeg emits regions in time order),
+    and the container duration parsed from the same pass — saving the
+    caller a separate ffprobe spawn.
+
+    Results are cached in the per-user cache dir keyed by the video's mtime/size and
+    the detection parameters — decoding the full audio track is by far the
+    slowest step here, and reruns while iterating on segment approvals hit
+    the same video every time.
     """
+    st = os.stat(video_path)
+    key = hashlib.sha1(
+        f"{os.path.abspath(video_path)}:{st.st_mtime_ns}:{st.st_size}"
+        f":{noise_threshold}:{min_duration}".encode()
+    ).hexdigest()
+    cache_path = os.path.join(_cache_dir(), f"silences-{key}.json")
+
+    if os.path.exists(cache_path):
+        try:
+            cached = _load_json(cache_path)
+            silences = cached["silences"]
+            silence_mids = np.fromiter(
+                ((s["start"] + s["end"]) / 2 for s in silences),
+                dtype=np.float64, count=len(silences)
+            )
+            return silences, silence_mids, cached["duration"]
+        except Exception:
+            pass  # corrupt or truncated cache — redetect below
+
+    # -vn skips decoding the video stream entirely (the null muxer would
+    # throw it away anyway), and raw PCM keeps the discarded audio encode
+    # trivial — silence detection only needs the decoded samples
     cmd = [
-        "ffmpeg", "-i", video_path,
+        "ffmpeg", "-nostdin", "-i", video_path,
+        "-vn", "-c:a", "pcm_s16le",
         "-af", f"silencedetect=noise={noise_threshold}dB:d={min_duration}",
         "-f", "null", "-"
     ]
-    result = subprocess.run(cmd, capture_output=True, text=True, timeout=120)
-    stderr = result.stderr
+
+    # Parse stderr as it streams rather than buffering the whole log —
+    # on hours-long videos silencedetect emits megabytes of lines, and
+    # capture_output would hold all of them just to regex them once
+    proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL,
+                            stderr=subprocess.PIPE, text=True)
 
     silences = []
-    current_start = None
-
-    for line in stderr.split("\n"):
-        if "silence_start:" in line:
-            try:
-                current_start = float(line.split("silence_start:")[1].strip().split()[0])
-            except (IndexError, ValueError):
-                pass
-        elif "silence_end:" in line and current_start is not None:
-            try:
-                parts = line.split("silence_end:")[1].strip().split()
-                end = float(parts[0])
-                silences.append({"start": current_start, "end": end})
-                current_start = None
-            except (IndexError, ValueError):
-                pass
-
-    return silences
-
-
-def find_nearest_silence(silences, target_time, search_window=2.0):
+    duration = 0.0
+    pending_start = None
+    for line in proc.stderr:
+        m = _SILENCE_START_RE.search(line)
+        if m:
+            pending_start = float(m.group(1))
+            continue
+        m = _SILENCE_END_RE.search(line)
+        if m and pending_start is not None:
+            silences.append({"start": pending_start, "end": float(m.group(1))})
+            pending_start = None
+            continue
+        if not duration:
+            m = _DURATION_RE.search(line)
+            if m:
+                duration = (int(m.group(1)) * 3600 + int(m.group(2)) * 60
+                            + float(m.group(3)))
+
+    proc.stderr.close()
+    proc.wait(timeout=120)
+
+    silence_mids = np.fromiter(
+        ((s["start"] + s["end"]) / 2 for s in silences),
+        dtype=np.float64, count=len(silences)
+    )
+
+    try:
+        _dump_json({"silences": silences, "duration": duration}, cache_path)
+    except OSError:
+        pass  # cache is best-effort
+
+    return silences, silence_mids, duration
+
+
+def find_nearest_silence(silence_mids, target_time, search_window=2.0):
     """Find the silence region closest to target_time within search_window.
 
     Returns the midpoint of the nearest silence, or None if no silence nearby.
+    Binary-searches the sorted midpoint array rather than scanning every
+    silence for every segment boundary.
     """
-    best = None
-    best_dist = float("inf")
-
-    for s in silences:
-        mid = (s["start"] + s["end"]) / 2
-        dist = abs(mid - target_time)
-        if dist < search_window and dist < best_dist:
-            best = mid
-            best_dist = dist
+    if len(silence_mids) == 0:
+        return None
+
+    i = int(np.searchsorted(silence_mids, target_time))
+    # Nearest midpoint is one of the two neighbors of the insertion point
+    lo = max(0, i - 1)
+    hi = min(len(silence_mids), i + 1)
+    best = float(
+        silence_mids[lo + np.abs(silence_mids[lo:hi] - target_time).argmin()]
+    )
 
-    return best
+    if abs(best - target_time) < search_window:
+        return best
+    return None
 
 
-def snap_start(words, proposed_start, search_window=1.5):
+def snap_start(word_starts, is_sentence_end, proposed_start, lo, hi):
     """Snap start time to the beginning of the nearest word.
 
-    Looks for a word that starts near proposed_start.
+    Works on the precomputed candidate range [lo, hi) of words starting
+    near proposed_start (see snap_segments, which batch-computes the
+    ranges for every segment at once).
     Prefers snapping to a sentence start (after punctuation) if one is nearby.
     """
-    # Find words near the proposed start
-    candidates = []
-    for i, w in enumerate(words):
-        if abs(w["start"] - proposed_start) <= search_window:
-            candidates.append((i, w))
-
-    if not candidates:
+    if lo >= hi:
         return proposed_start
 
-    # Check if any candidate is a sentence start (previous word ends with . ? !)
-    sentence_starts = []
-    for idx, w in candidates:
-        if idx == 0:
-            sentence_starts.append((idx, w))
-        elif words[idx - 1]["text"].rstrip()[-1:] in ".?!":
-            sentence_starts.append((idx, w))
+    dists = np.abs(word_starts[lo:hi] - proposed_start)
+
+    # Check if any candidate is a sentence start (previous word ends with
+    # . ? ! — the flag array shifted by one; word 0 always starts one)
+    if lo == 0:
+        sentence_starts = np.concatenate(([True], is_sentence_end[:hi - 1]))
+    else:
+        sentence_starts = is_sentence_end[lo - 1:hi - 1]
 
-    # Prefer sentence start if available and within window
-    if sentence_starts:
-        # Pick the one closest to proposed start
-        best_idx, best_w = min(sentence_starts, key=lambda x: abs(x[1]["start"] - proposed_start))
-        return best_w["start"]
+    # Prefer sentence start if available and within window — pick the one
+    # closest to the proposed start
+    if sentence_starts.any():
+        candidates = np.flatnonzero(sentence_starts)
+        best_idx = lo + int(candidates[dists[candidates].argmin()])
+        return float(word_starts[best_idx])
 
     # Otherwise, snap to nearest word start
-    best_idx, best_w = min(candidates, key=lambda x: abs(x[1]["start"] - proposed_start))
-    return best_w["start"]
+    best_idx = lo + int(dists.argmin())
+    return float(word_starts[best_idx])
 
 
-def snap_end(words, proposed_end, search_window=3.0, pad_ms=300):
+def snap_end(word_starts, word_ends, is_sentence_end, proposed_end, lo, hi,
+             search_window=3.0, pad_ms=300):
     """Snap end time to after the last complete sentence.
 
     Extends to the next sentence boundary (. ? !) if within search_window.
-    Adds pad_ms of silence after the last word.
+    Adds pad_ms of silence after the last word. [lo, hi) is the
+    precomputed range of words ending near proposed_end, used for the
+    nearest-word-end fallback.
     """
     pad = pad_ms / 1000.0
 
-    # Find the last word that ends at or before proposed_end
-    last_word_idx = None
-    for i, w in enumerate(words):
-        if w["end"] <= proposed_end + 0.2:  # small tolerance for timestamp imprecision
-            last_word_idx = i
-
-    if last_word_idx is None:
+    # Find the last word that ends at or before proposed_end, with a small
+    # tolerance for timestamp imprecision (bisect — word_ends is sorted)
+    last_word_idx = int(np.searchsorted(word_ends, proposed_end + 0.2, side="right")) - 1
+    if last_word_idx < 0:
         return proposed_end
 
     # Check if the last word ends a sentence
-    last_word = words[last_word_idx]
-    if last_word["text"].rstrip()[-1:] in ".?!":
-        return last_word["end"] + pad
+    if is_sentence_end[last_word_idx]:
+        return float(word_ends[last_word_idx]) + pad
 
     # Look forward for the next sentence-ending word within search_window
-    for i in range(last_word_idx + 1, len(words)):
-        w = words[i]
-        if w["start"] > proposed_end + search_window:
+    for i in range(last_word_idx + 1, len(word_starts)):
+        if word_starts[i] > proposed_end + search_window:
             break
-        if w["text"].rstrip()[-1:] in ".?!":
-            return w["end"] + pad
+        if is_sentence_end[i]:
+            return float(word_ends[i]) + pad
 
-    # No sentence boundary found nearby — snap to nearest word end
-    # Find the word whose end is closest to proposed_end
-    candidates = []
-    for i, w in enumerate(words):
-        if abs(w["end"] - proposed_end) <= 1.0:
-            candidates.append(w)
-
-    if candidates:
-        best = min(candidates, key=lambda w: abs(w["end"] - proposed_end))
-        return best["end"] + pad
+    # No sentence boundary found nearby — snap to nearest word end within
+    # the precomputed candidate range
+    if lo < hi:
+        best_idx = lo + int(np.abs(word_ends[lo:hi] - proposed_end).argmin())
+        return float(word_ends[best_idx]) + pad
 
     return proposed_end
 
 
-def snap_segment(words, silences, seg, video_duration):
-    """Snap a single segment's boundaries.
+def snap_segments(word_starts, word_ends, is_sentence_end, silence_mids,
+                  segments, video_duration):
+    """Snap every segment's boundaries.
 
-    Returns adjusted (start, end) tuple.
-    """
-    proposed_start = seg["start"]
-    proposed_end = seg["end"]
+    The word-candidate windows for all segments are computed with four
+    vectorized searchsorted calls up front; each segment's fine-grained
+    snapping then works on its own precomputed [lo, hi) slice.
 
-    # Step 1: Snap to word boundaries
-    new_start = snap_start(words, proposed_start)
-    new_end = snap_end(words, proposed_end)
-
-    # Step 2: If we have silence data, try to cut at silence points
-    if silences:
-        # For start: prefer cutting at a silence just before the first word
-        silence_start = find_nearest_silence(silences, new_start, search_window=1.5)
-        if silence_start is not None and silence_start <= new_start:
-            new_start = silence_start
-
-        # For end: prefer cutting at a silence just after the last word
-        silence_end = find_nearest_silence(silences, new_end, search_window=2.0)
-        if silence_end is not None and silence_end >= new_end - 0.5:
-            new_end = silence_end
-
-    # Clamp to video duration
-    new_start = max(0.0, new_start)
-    new_end = min(video_duration, new_end)
-
-    # Ensure minimum duration (5s) and maximum (60s)
-    if new_end - new_start < 5.0:
-        new_end = min(new_start + 5.0, video_duration)
-    if new_end - new_start > 60.0:
-        new_end = new_start + 60.0
-
-    return round(new_start, 3), round(new_end, 3)
+    Returns list of adjusted (start, end) tuples, one per segment.
+    """
+    count = len(segments)
+    proposed_starts = np.fromiter((s["start"] for s in segments),
+                                  dtype=np.float64, count=count)
+    proposed_ends = np.fromiter((s["end"] for s in segments),
+                                dtype=np.float64, count=count)
+
+    # Candidate words starting within 1.5s of each proposed start, and
+    # ending within 1.0s of each proposed end (the nearest-word fallback)
+    start_los = np.searchsorted(word_starts, proposed_starts - 1.5, side="left")
+    start_his = np.searchsorted(word_starts, proposed_starts + 1.5, side="right")
+    end_los = np.searchsorted(word_ends, proposed_ends - 1.0, side="left")
+    end_his = np.searchsorted(word_ends, proposed_ends + 1.0, side="right")
+
+    snapped = []
+    for k, seg in enumerate(segments):
+        # Step 1: Snap to word boundaries
+        new_start = snap_start(word_starts, is_sentence_end,
+                               seg["start"], int(start_los[k]), int(start_his[k]))
+        new_end = snap_end(word_starts, word_ends, is_sentence_end,
+                           seg["end"], int(end_los[k]), int(end_his[k]))
+
+        # Step 2: If we have silence data, try to cut at silence points
+        if len(silence_mids):
+            # For start: prefer cutting at a silence just before the first word
+            silence_start = find_nearest_silence(silence_mids, new_start, search_window=1.5)
+            if silence_start is not None and silence_start <= new_start:
+                new_start = silence_start
+
+            # For end: prefer cutting at a silence just after the last word
+            silence_end = find_nearest_silence(silence_mids, new_end, search_window=2.0)
+            if silence_end is not None and silence_end >= new_end - 0.5:
+                new_end = silence_end
+
+        snapped.append((new_start, new_end))
+
+    # Clamp the whole batch to [0, video_duration] and enforce the 5-60s
+    # duration bounds in one branchless pass
+    new_starts = np.maximum(0.0, np.array([s for s, _ in snapped]))
+    new_ends = np.minimum(video_duration, np.array([e for _, e in snapped]))
+    durs = np.clip(new_ends - new_starts, 5.0, 60.0)
+    new_ends = np.minimum(new_starts + durs, video_duration)
+
+    new_starts = np.round(new_starts, 3)
+    new_ends = np.round(new_ends, 3)
+
+    return list(zip(new_starts.tolist(), new_ends.tolist()))
 
 
 def main():
@@ -226,35 +384,40 @@ def main():
     args = parser.parse_args()
 
     # Load data
-    words = load_word_timeline(args.transcript)
-    if not words:
+    word_starts, word_ends, is_sentence_end = load_word_timeline(args.transcript)
+    if not len(word_starts):
         print(json.dumps({"error": "No word-level timestamps found in transcript"}))
         sys.exit(1)
 
-    with open(args.segments) as f:
-        segments_data = json.load(f)
-
-    # Get video duration
-    result = subprocess.run(
-        ["ffprobe", "-v", "quiet", "-show_entries", "format=duration",
-         "-of", "csv=p=0", args.input_video],
-        capture_output=True, text=True
-    )
-    video_duration = float(result.stdout.strip())
+    segments_data = _load_json(args.segments)
 
-    # Detect silences (unless disabled)
+    # Detect silences (unless disabled); the same ffmpeg pass reports the
+    # container duration, so ffprobe only runs when silence detection is off
     silences = []
+    silence_mids = np.empty(0, dtype=np.float64)
+    video_duration = 0.0
     if not args.no_silence:
-        silences = detect_silences(args.input_video)
+        silences, silence_mids, video_duration = detect_silences(args.input_video)
+
+    if not video_duration:
+        result = subprocess.run(
+            ["ffprobe", "-v", "quiet", "-show_entries", "format=duration",
+             "-of", "csv=p=0", args.input_video],
+            capture_output=True, text=True
+        )
+        video_duration = float(result.stdout.strip())
+
+    # Snap all segments (candidate windows batch-computed inside)
+    snapped = snap_segments(
+        word_starts, word_ends, is_sentence_end, silence_mids,
+        segments_data["segments"], video_duration
+    )
 
-    # Snap each segment
     adjustments = []
-    for seg in segments_data["segments"]:
+    for seg, (new_start, new_end) in zip(segments_data["segments"], snapped):
         old_start = seg["start"]
         old_end = seg["end"]
 
-        new_start, new_end = snap_segment(words, silences, seg, video_duration)
-
         seg["start"] = new_start
         seg["end"] = new_end
         seg["duration"] = round(new_end - new_start, 3)
@@ -270,15 +433,14 @@ def main():
 
     # Write output
     os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
-    with open(args.output, "w") as f:
-        json.dump(segments_data, f, indent=2)
+    _dump_json(segments_data, args.output)
 
     # Print summary
     print(json.dumps({
         "action": "snap_boundaries",
         "segments_processed": len(adjustments),
         "silences_detected": len(silences),
-        "word_count": len(words),
+        "word_count": len(word_starts),
         "adjustments": adjustments,
     }, indent=2))
 
@@ -38,26 +38,95 @@ import json
 import os
 import subprocess
 import sys
-import tempfile
 import time
 
+import numpy as np
 
-def extract_audio(video_path, audio_path):
-    """Extract audio from video as 16kHz mono WAV."""
+try:
+    import orjson  # optional; C JSON codec, much faster on large transcripts
+except ImportError:
+    orjson = None
+
+
+def _dump_json(obj, path):
+    """Write a JSON file with 2-space indent, using orjson when available."""
+    if orjson is not None:
+        with open(path, "wb") as f:
+            f.write(orjson.dumps(obj, option=orjson.OPT_INDENT_2))
+        return
+    with open(path, "w") as f:
+        json.dump(obj, f, indent=2)
+
+
+def _dumps_line(obj):
+    """Serialize one object as a JSONL line (bytes)."""
+    if orjson is not None:
+        return orjson.dumps(obj) + b"\n"
+    return (json.dumps(obj) + "\n").encode()
+
+
+def decode_audio(input_path):
+    """Decode the audio track to a 16kHz mono float32 array in memory.
+
+    FFmpeg pipes raw f32 PCM straight to us — no temp WAV on disk and no
+    redundant second decode when faster-whisper would re-read the file.
+    Works for video and audio-only inputs alike.
+    """
     cmd = [
-        "ffmpeg", "-y", "-i", video_path,
-        "-vn", "-acodec", "pcm_s16le", "-ar", "16000", "-ac", "1",
-        audio_path
+        "ffmpeg", "-nostdin", "-i", input_path,
+        "-vn", "-f", "f32le", "-ac", "1", "-ar", "16000", "-"
     ]
-    result = subprocess.run(cmd, capture_output=True, text=True)
-    if result.returncode != 0:
-        print(json.dumps({"error": f"Audio extraction failed: {result.stderr[-300:]}"}))
+    result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if result.returncode != 0 or not result.stdout:
+        stderr = result.stderr.decode(errors="replace")
+        print(json.dumps({"error": f"Audio extraction failed: {stderr[-300:]}"}))
         sys.exit(1)
+    return np.frombuffer(result.stdout, dtype=np.float32)
+
+
+def to_captions(segments):
+    """Derive the Remotion caption array from transcribed segments.
+
+    Captions are a projection of segments[].words ({text, startMs, endMs}),
+    so they are reconstructed here at write time instead of being carried
+    as a second full copy of every word through transcription. The leading
+    space matches faster-whisper's word tokens — createTikTokStyleCaptions
+    joins token texts verbatim.
+    """
+    return [
+        {
+            "text": " " + w["word"],
+            "startMs": int(w["start"] * 1000),
+            "endMs": int(w["end"] * 1000),
+        }
+        for seg in segments
+        for w in seg["words"]
+    ]
+
+
+def transcribe(audio, model_size="large-v3", device="auto", compute_type="auto",
+               batch_size=16, stream_to=None):
+    """Run faster-whisper transcription with word-level timestamps.
+
+    audio is a 16kHz mono float32 array (see decode_audio). Only segments
+    are accumulated — the caption array is a projection of them, derived
+    later by to_captions (or streamed straight to disk with stream_to).
 
+    On CUDA, VAD-extracted speech chunks are batched through the encoder
+    via BatchedInferencePipeline (several times faster on long audio). The
+    CPU path stays non-batched — batching there just adds thread
+    contention.
 
-def transcribe(audio_path, model_size="large-v3", device="auto", compute_type="auto"):
-    """Run faster-whisper transcription with word-level timestamps."""
+    With stream_to set (a base output path), segments and captions are
+    appended to <stream_to>.segments.jsonl / <stream_to>.captions.jsonl as
+    they are produced instead of accumulating in memory — only counts are
+    kept. Peak RSS stays flat regardless of transcript length.
+    """
     from faster_whisper import WhisperModel
+    try:
+        from faster_whisper import BatchedInferencePipeline
+    except ImportError:  # faster-whisper < 1.0
+        BatchedInferencePipeline = None
 
     # Auto-detect device
     if device == "auto":
@@ -67,14 +136,23 @@ def transcribe(audio_path, model_size="large-v3", device="auto", compute_type="a
         except ImportError:
             device = "cpu"
 
-    # Auto-detect compute type
+    # Auto-detect compute type. int8_float16 (int8 weights, fp16
+    # activations) halves VRAM and memory traffic on the attention matmuls
+    # vs plain float16, with negligible accuracy loss
     if compute_type == "auto":
-        compute_type = "float16" if device == "cuda" else "int8"
-
-    model = WhisperModel(model_size, device=device, compute_type=compute_type)
+        compute_type = "int8_float16" if device == "cuda" else "int8"
+
+    if device == "cuda":
+        model = WhisperModel(model_size, device=device, compute_type=compute_type)
+    else:
+        # On CPU, give CTranslate2 explicit intra-op threads and two
+        # workers so decode overlaps the next chunk's encode
+        model = WhisperModel(
+            model_size, device=device, compute_type=compute_type,
+            cpu_threads=max(1, (os.cpu_count() or 2) // 2), num_workers=2,
+        )
 
-    segments_iter, info = model.transcribe(
-        audio_path,
+    transcribe_kwargs = dict(
         beam_size=5,
         word_timestamps=True,
         vad_filter=True,
@@ -84,36 +162,63 @@ def transcribe(audio_path, model_size="large-v3", device="auto", compute_type="a
         ),
     )
 
-    segments = []
-    captions = []
-
-    for segment in segments_iter:
-        seg_data = {
-            "start": round(segment.start, 3),
-            "end": round(segment.end, 3),
-            "text": segment.text.strip(),
-            "words": [],
-        }
+    if device == "cuda" and BatchedInferencePipeline is not None:
+        batched = BatchedInferencePipeline(model=model)
+        segments_iter, info = batched.transcribe(
+            audio, batch_size=batch_size, **transcribe_kwargs
+        )
+    else:
+        segments_iter, info = model.transcribe(audio, **transcribe_kwargs)
 
-        if segment.words:
-            for word in segment.words:
-                seg_data["words"].append({
-                    "word": word.word.strip(),
-                    "start": round(word.start, 3),
-                    "end": round(word.end, 3),
-                })
+    segments = []
+    stats = {"segments": 0, "words": 0, "captions": 0}
 
-                # Remotion caption format: {text, startMs, endMs}
-                # faster-whisper preserves leading spaces in word.word
-                captions.append({
-                    "text": word.word,
-                    "startMs": int(word.start * 1000),
-                    "endMs": int(word.end * 1000),
-                })
+    seg_f = cap_f = None
+    if stream_to:
+        seg_f = open(stream_to + ".segments.jsonl", "wb")
+        cap_f = open(stream_to + ".captions.jsonl", "wb")
 
-        segments.append(seg_data)
+    try:
+        for segment in segments_iter:
+            seg_data = {
+                "start": round(segment.start, 3),
+                "end": round(segment.end, 3),
+                "text": segment.text.strip(),
+                "words": [],
+            }
+
+            if segment.words:
+                for word in segment.words:
+                    seg_data["words"].append({
+                        "word": word.word.strip(),
+                        "start": round(word.start, 3),
+                        "end": round(word.end, 3),
+                    })
+
+                    if cap_f is not None:
+                        # Remotion caption format: {text, startMs, endMs}
+                        # faster-whisper preserves leading spaces in word.word
+                        cap_f.write(_dumps_line({
+                            "text": word.word,
+                            "startMs": int(word.start * 1000),
+                            "endMs": int(word.end * 1000),
+                        }))
+                    stats["captions"] += 1
+
+            stats["segments"] += 1
+            stats["words"] += len(seg_data["words"])
+
+            if seg_f is not None:
+                seg_f.write(_dumps_line(seg_data))
+            else:
+                segments.append(seg_data)
+    finally:
+        if seg_f is not None:
+            seg_f.close()
+        if cap_f is not None:
+            cap_f.close()
 
-    return segments, captions, info, device, compute_type
+    return segments, stats, info, device, compute_type
 
 
 def main():
@@ -125,8 +230,16 @@ def main():
     parser.add_argument("--device", default="auto", choices=["auto", "cuda", "cpu"],
                         help="Compute device (default: auto)")
     parser.add_argument("--compute-type", default="auto",
-                        choices=["auto", "float16", "int8", "float32"],
+                        choices=["auto", "float16", "int8", "int8_float16", "float32"],
                         help="Compute type (default: auto)")
+    parser.add_argument("--batch-size", type=int, default=16,
+                        help="Encoder batch size for batched CUDA inference "
+                             "(default: 16)")
+    parser.add_argument("--jsonl", action="store_true",
+                        help="Stream segments/captions to JSONL sidecar files "
+                             "as they are produced (flat memory on very long "
+                             "videos); the output JSON then references them "
+                             "instead of embedding the arrays")
 
     args = parser.parse_args()
 
@@ -136,30 +249,17 @@ def main():
 
     start_time = time.time()
 
-    # Extract audio if input is video
-    audio_path = args.input
-    tmp_audio = None
+    # Decode audio in-memory (no temp WAV; handles video and audio inputs)
+    audio = decode_audio(args.input)
 
-    # Check if input has video stream (i.e., it's a video file, not audio)
-    probe = subprocess.run(
-        ["ffprobe", "-v", "quiet", "-select_streams", "v:0",
-         "-show_entries", "stream=codec_type", "-of", "csv=p=0", args.input],
-        capture_output=True, text=True
-    )
-    if "video" in probe.stdout:
-        tmp_file = tempfile.NamedTemporaryFile(suffix=".wav", delete=False)
-        tmp_audio = tmp_file.name
-        tmp_file.close()
-        audio_path = tmp_audio
-        extract_audio(args.input, audio_path)
+    if args.jsonl:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
 
-    try:
-        segments, captions, info, actual_device, actual_compute = transcribe(
-            audio_path, args.model, args.device, args.compute_type
-        )
-    finally:
-        if tmp_audio and os.path.exists(tmp_audio):
-            os.unlink(tmp_audio)
+    segments, stats, info, actual_device, actual_compute = transcribe(
+        audio, args.model, args.device, args.compute_type,
+        batch_size=args.batch_size,
+        stream_to=args.output if args.jsonl else None
+    )
 
     elapsed = time.time() - start_time
 
@@ -171,8 +271,7 @@ def main():
     )
     duration = float(duration_cmd.stdout.strip()) if duration_cmd.stdout.strip() else 0
 
-    # Count total words
-    word_count = sum(len(seg.get("words", [])) for seg in segments)
+    word_count = stats["words"]
 
     output = {
         "language": info.language,
@@ -183,15 +282,18 @@ def main():
         "device": actual_device,
         "compute_type": actual_compute,
         "transcription_time_sec": round(elapsed, 1),
-        "segments": segments,
-        "captions": captions,
     }
+    if args.jsonl:
+        output["segments_file"] = args.output + ".segments.jsonl"
+        output["captions_file"] = args.output + ".captions.jsonl"
+    else:
+        output["segments"] = segments
+        output["captions"] = to_captions(segments)
 
     # Ensure output directory exists
     os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
 
-    with open(args.output, "w") as f:
-        json.dump(output, f, indent=2)
+    _dump_json(output, args.output)
 
     # Print summary (not the full transcript)
     summary = {
@@ -201,8 +303,8 @@ def main():
         "language": info.language,
         "duration": round(duration, 1),
         "word_count": word_count,
-        "segment_count": len(segments),
-        "caption_count": len(captions),
+        "segment_count": stats["segments"],
+        "caption_count": stats["captions"],
         "model": args.model,
         "transcription_time_sec": round(elapsed, 1),
         "realtime_factor": round(duration / elapsed, 1) if elapsed > 0 else 0,
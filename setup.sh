@@ -35,6 +35,12 @@ if [ -d "$HOME/.video-skill" ]; then
         echo "[Python] Installing opencv-python..."
         "$VENV/bin/pip" install --quiet opencv-python
     fi
+
+    # Check orjson
+    if ! "$VENV/bin/python3" -c "import orjson" 2>/dev/null; then
+        echo "[Python] Installing orjson..."
+        "$VENV/bin/pip" install --quiet orjson
+    fi
 else
     VENV="$HOME/.shorts-skill"
     if [ -d "$VENV" ]; then
@@ -58,8 +64,8 @@ else
             --index-url https://download.pytorch.org/whl/cpu
     fi
 
-    echo "[Python] Installing faster-whisper, mediapipe, numpy, opencv-python..."
-    "$VENV/bin/pip" install --quiet faster-whisper mediapipe numpy opencv-python
+    echo "[Python] Installing faster-whisper, mediapipe, numpy, opencv-python, orjson..."
+    "$VENV/bin/pip" install --quiet faster-whisper mediapipe numpy opencv-python orjson
 fi
 
 echo "[Python] Venv ready: $VENV"